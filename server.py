@@ -5,7 +5,7 @@ On windows, run `server.exe`.
 
 (executable created with: `pyinstaller --onefile server.py`)
 
-Otherwise, requires python 3.3 or greater.
+Otherwise, requires python 3.7 or greater.
 
 Run `python3 server.py`
 
@@ -16,14 +16,16 @@ import argparse
 import http.client
 import json
 import os
-import posixpath
+import re
+import stat
 import sys
 import threading
-import time
 import urllib.parse
 import urllib.request
 import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from collections import OrderedDict
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
 
 DIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -50,8 +52,10 @@ if not os.path.exists(STATIC_ASSETS_DIR):
 
 PORTAL_CLIENT_CLASS = None
 PORTAL_HOST = None
+PORTAL_URL = None
 SEARCH_CLIENT_CLASS = None
 SEARCH_HOST = None
+SEARCH_URL = None
 
 filetypes = {
     'html',
@@ -72,11 +76,60 @@ filetypes = {
     'woff2',
 }
 
+# precomputed for a single C-level str.endswith on the hot GET path
+FILETYPE_SUFFIXES = tuple('.' + filetype for filetype in filetypes)
+
+# suffixes that can never appear in redirects.json (pages may be
+# redirected, assets are not), used to skip the redirect lookup
+ASSET_SUFFIXES = tuple(s for s in FILETYPE_SUFFIXES if s != '.html')
+
+# paths trying to traverse upwards, rejected before touching the fs
+UNSAFE_PATH_RE = re.compile(r'(^|/)\.\.(/|$)')
+
 AUTH_PATH_PREFIX = '/_api/authenticate'
 HISTORICAL_VERSIONS_PATH_PREFIXES = ('/_publication', '/_date', '/_compare')
 PORTAL_PATH_PREFIXES = ('/_portal', '/_api') + HISTORICAL_VERSIONS_PATH_PREFIXES
 
 
+# cached upstream connections, keyed per thread so each worker reuses
+# its own keep-alive connection instead of paying a TCP/TLS handshake
+# on every proxied request
+_conn_cache = {}
+_conn_cache_lock = threading.Lock()
+
+
+def _get_upstream_connection(Client, host, reconnect=False):
+    key = (Client, host, threading.get_ident())
+    with _conn_cache_lock:
+        client = None if reconnect else _conn_cache.get(key)
+        if client is None:
+            client = Client(host, timeout=30)
+            _conn_cache[key] = client
+    return client
+
+
+def _drop_upstream_connection(Client, host):
+    key = (Client, host, threading.get_ident())
+    with _conn_cache_lock:
+        client = _conn_cache.pop(key, None)
+    if client is not None:
+        client.close()
+
+
+def _close_thread_connections():
+    """
+    close and forget the current thread's cached upstream connections;
+    called as each worker thread exits so connections don't linger (or
+    get inherited half-used when a thread ident is reused).
+    """
+    ident = threading.get_ident()
+    with _conn_cache_lock:
+        stale_keys = [key for key in _conn_cache if key[2] == ident]
+        clients = [_conn_cache.pop(key) for key in stale_keys]
+    for client in clients:
+        client.close()
+
+
 # custom 404 error template
 try:
     with open("404.html", "r") as f:
@@ -86,126 +139,377 @@ except FileNotFoundError:
 
 
 def download_static_assets(static_assets_repo_url=STATIC_ASSETS_REPO_URL, force=False):
-    from io import BytesIO
     from zipfile import ZipFile
+    import tempfile
+    import urllib.error
     import urllib.request
     import shutil
 
     # skip download if already exists
-    if not (len(os.listdir(STATIC_ASSETS_DIR)) == 0 or force):
-        return
+    marker_path = os.path.join(STATIC_ASSETS_DIR, '.downloaded')
+    if not force:
+        if os.path.exists(marker_path):
+            return
+        # no marker (dir populated by an older version of this script):
+        # treat any entry at all as already downloaded
+        with os.scandir(STATIC_ASSETS_DIR) as entries:
+            if next(entries, None) is not None:
+                return
 
     print("\nDownloading static assets...\n")
 
     try:
-        # fix for CERTIFICATE_VERIFY_FAILED
+        # fix for CERTIFICATE_VERIFY_FAILED: fall back to unverified
+        # HTTPS only when default verification demonstrably fails (e.g.
+        # a python install without a usable cert bundle), instead of
+        # unconditionally disabling it
         def _fix_cert():
+            if os.environ.get('PYTHONHTTPSVERIFY', ''):
+                return
             import ssl
-            if not os.environ.get('PYTHONHTTPSVERIFY', '') and getattr(ssl, '_create_unverified_context', None):
-                ssl._create_default_https_context = ssl._create_unverified_context
+            if not getattr(ssl, '_create_unverified_context', None):
+                return
+            probe = urllib.request.Request(
+                static_assets_repo_url, method='HEAD')
+            try:
+                urllib.request.urlopen(probe, timeout=5).close()
+            except urllib.error.URLError as e:
+                if isinstance(e.reason, ssl.SSLError):
+                    ssl._create_default_https_context = ssl._create_unverified_context
+            except Exception:
+                pass
 
         ZIP_URL = "{}/archive/master.zip".format(static_assets_repo_url)
 
         _fix_cert()
         data = urllib.request.urlopen(ZIP_URL)
 
-        with ZipFile(BytesIO(data.read())) as zip_file:
-            files = zip_file.namelist()
-            root_dir = files.pop(0)
-
-            for member in files:
-                member_path = os.path.join(
-                    STATIC_ASSETS_DIR, os.path.relpath(member, root_dir))
-                # skip empty directories
-                if not os.path.basename(member):
-                    if not os.path.exists(member_path):
-                        os.mkdir(member_path)
-                    continue
-
-                # copy file (taken from zipfile's extract)
-                source = zip_file.open(member)
-                target = open(member_path, "wb")
-                with source, target:
-                    shutil.copyfileobj(source, target)
+        # stream the archive to a temp file rather than slurping it all
+        # into memory before ZipFile can even open it
+        with tempfile.TemporaryFile() as zip_tmp:
+            shutil.copyfileobj(data, zip_tmp, 1024 * 1024)
+            zip_tmp.seek(0)
+
+            with ZipFile(zip_tmp) as zip_file:
+                root_dir = zip_file.namelist()[0]
+
+                # let extractall do the copying (C-level loops, no
+                # per-member python setup), then swap the archive's
+                # root directory into place
+                scratch_dir = STATIC_ASSETS_DIR + '.tmp'
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+                zip_file.extractall(scratch_dir)
+                shutil.rmtree(STATIC_ASSETS_DIR, ignore_errors=True)
+                os.rename(os.path.join(
+                    scratch_dir, root_dir.rstrip('/')), STATIC_ASSETS_DIR)
+                os.rmdir(scratch_dir)
+
+        # mark the download complete so later startups skip it with a
+        # single stat instead of listing the directory
+        open(marker_path, 'w').close()
 
     except Exception as e:
         print("ERROR: {}".format(str(e)))
-        sys.exit(1)
+        # this may run on the background assets thread, where sys.exit
+        # would only end the thread; a library without its static
+        # assets is unusable, so take the whole process down like the
+        # foreground download used to
+        sys.stdout.flush()
+        os._exit(1)
+
+
+class Server(ThreadingHTTPServer):
+    """
+    threaded server so parallel asset loads and slow proxied upstream
+    calls don't stall each other, with a semaphore bounding the number
+    of concurrent worker threads.
+    """
+    daemon_threads = True
+    max_workers = 32
+
+    def __init__(self, *args, **kwargs):
+        self._worker_slots = threading.BoundedSemaphore(self.max_workers)
+        # set once the listening socket is live, so startup helpers can
+        # wait on readiness instead of sleeping
+        self.ready = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def server_activate(self):
+        super().server_activate()
+        self.ready.set()
+
+    def process_request(self, request, client_address):
+        self._worker_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._worker_slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            _close_thread_connections()
+            self._worker_slots.release()
 
 
 class RequestHandler(SimpleHTTPRequestHandler):
     if ERROR_404_TEMPLATE:
         error_message_format = ERROR_404_TEMPLATE
 
-    def _proxy(self, Client, host, upstream_name, method='GET', body=None):
+    # speak HTTP/1.1 so browsers keep connections open across the many
+    # asset and /_api fetches of a page load; every response below is
+    # framed with Content-Length or chunked encoding to match
+    protocol_version = 'HTTP/1.1'
+
+    # reap keep-alive connections idle this many seconds, so they give
+    # their worker slot back instead of pinning it until the browser
+    # closes; handle_one_request turns the socket timeout into
+    # close_connection for us
+    timeout = 30
+
+    # buffer the response stream so the status line, headers and small
+    # bodies reach the socket in one send() instead of one each
+    wbufsize = 64 * 1024
+
+    # memoized translate_path results; the served tree is fixed for the
+    # lifetime of the server, so entries never need invalidating
+    _path_cache = {}
+    _path_cache_lock = threading.Lock()
+    _path_cache_max = 4096
+
+    # LRU cache of small static file bodies keyed by (path, mtime) -
+    # a user-space page cache for the hot css/js/mustache/html working set
+    _file_cache = OrderedDict()
+    _file_cache_lock = threading.Lock()
+    _file_cache_bytes = 0
+    _file_cache_max_bytes = 64 * 1024 * 1024
+    _file_cache_max_file = 512 * 1024
+
+    def send_head(self):
+        """
+        serve a precompressed .gz sibling when the client accepts gzip,
+        or small files from the in-process cache, falling back to the
+        base implementation for directories, large files, conditional
+        requests and anything that fails to stat.
+        """
+        path = self.translate_path(self.path)
+
+        # conditional revalidation goes to the base implementation so
+        # If-Modified-Since keeps yielding 304s
+        if 'If-Modified-Since' in self.headers:
+            return super().send_head()
+
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            try:
+                f = open(path + '.gz', 'rb')
+            except OSError:
+                pass
+            else:
+                gz_st = os.fstat(f.fileno())
+                self.send_response(200)
+                self.send_header('Content-type', self.guess_type(path))
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Vary', 'Accept-Encoding')
+                self.send_header('Content-Length', str(gz_st.st_size))
+                self.send_header(
+                    'Last-Modified', self.date_time_string(gz_st.st_mtime))
+                self.end_headers()
+                return f
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        if (stat.S_ISDIR(st.st_mode)
+                or st.st_size > self._file_cache_max_file):
+            return super().send_head()
+
+        cls = RequestHandler
+        key = (path, st.st_mtime)
+        with cls._file_cache_lock:
+            data = cls._file_cache.get(key)
+            if data is not None:
+                cls._file_cache.move_to_end(key)
+        if data is None:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return super().send_head()
+            with cls._file_cache_lock:
+                # another thread may have loaded the same file while we
+                # read it; don't count the bytes twice
+                if key not in cls._file_cache:
+                    cls._file_cache[key] = data
+                    cls._file_cache_bytes += len(data)
+                    while cls._file_cache_bytes > cls._file_cache_max_bytes:
+                        _, evicted = cls._file_cache.popitem(last=False)
+                        cls._file_cache_bytes -= len(evicted)
+
+        self.send_response(200)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.end_headers()
+        return BytesIO(data)
+
+    def send_simple_response(self, code, body=b'', headers=()):
+        """
+        send a complete small response - status line, headers and body -
+        through the buffered response stream in a single write.
+        """
+        self.send_response(code)
+        for keyword, value in headers:
+            self.send_header(keyword, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    if hasattr(os, 'sendfile'):
+        def copyfile(self, source, outputfile):
+            """
+            copy a regular file to the client socket with os.sendfile,
+            avoiding the user-space read/write loop in shutil.copyfileobj.
+            Falls back to the default implementation when either end is
+            not backed by a file descriptor (e.g. a proxied response).
+            """
+            try:
+                src_fd = source.fileno()
+                dst_fd = outputfile.fileno()
+            except (AttributeError, OSError, ValueError):
+                return super().copyfile(source, outputfile)
+            outputfile.flush()
+            offset = 0
+            while True:
+                try:
+                    sent = os.sendfile(dst_fd, src_fd, offset, 1 << 20)
+                except (BlockingIOError, OSError):
+                    if offset:
+                        raise
+                    # source is not a regular file (EINVAL etc.)
+                    return super().copyfile(source, outputfile)
+                if sent == 0:
+                    break
+                offset += sent
+
+    def _proxy(self, Client, host, upstream_name, upstream_url, method='GET', body=None):
         """
         proxy the current request to the given host using the given
         http.client Client class. 404 if not configured to proxy
         the path.
         """
         if Client is None:
-            self.send_response(400)
-            self.end_headers()
             message = 'Local server not configured to proxy {0}. Please run with the "--{0}-proxy-url" flag '.format(
                 upstream_name)
-            self.wfile.write(message.encode('utf-8'))
+            self.send_simple_response(400, message.encode('utf-8'))
             return
-        client = Client(host)
-        req_headers = {}
-        req_headers.update(self.headers)
-        req_headers.pop('Host', None)
-        req_headers.update({
-            'X-Forwarded-For': 'self.address_string()',
-            'X-Forwarded-Host': self.headers['Host'],
-            'X-Forwarded-Proto': 'http',
-        })
-        if method in http.client._METHODS_EXPECTING_BODY:
-            client.request(method, self.path, headers=req_headers, body=body)
-        else:
-            client.request(method, self.path, headers=req_headers)
+        req_headers = {k: v for k, v in self.headers.items() if k != 'Host'}
+        req_headers['X-Forwarded-For'] = self.address_string()
+        req_headers['X-Forwarded-Host'] = self.headers.get('Host', '')
+        req_headers['X-Forwarded-Proto'] = 'http'
+
+        def _request(client):
+            if method in http.client._METHODS_EXPECTING_BODY:
+                client.request(method, self.path, headers=req_headers, body=body)
+            else:
+                client.request(method, self.path, headers=req_headers)
+            return client.getresponse()
+
+        client = _get_upstream_connection(Client, host)
         try:
-            resp = client.getresponse()
+            try:
+                resp = _request(client)
+            except (ConnectionError, http.client.BadStatusLine,
+                    http.client.ImproperConnectionState):
+                # the cached connection went stale (upstream closed its
+                # end, or a previous response was only part-read);
+                # reconnect once and retry
+                client.close()
+                client = _get_upstream_connection(Client, host, reconnect=True)
+                resp = _request(client)
         except:
-            self.send_response(500)
-            self.end_headers()
-            host = client.host
-            scheme = type(client).__name__[:-10].lower()
-            url = urllib.parse.urlunsplit((host, scheme, '', ''))
-            message = 'Something went wrong proxying to {}'.format(url)
-            self.wfile.write(message.encode('utf-8'))
+            _drop_upstream_connection(Client, host)
+            message = 'Something went wrong proxying to {}'.format(
+                upstream_url)
+            self.send_simple_response(500, message.encode('utf-8'))
         else:
-            self.send_response(resp.code)
-            for k, v in resp.headers.items():
-                if k not in ('Transfer-Encoding', 'Connection'):
-                    self.send_header(k, v)
-            self.end_headers()
-            self.copyfile(resp, self.wfile)
+            try:
+                self.send_response(resp.code)
+                for k, v in resp.headers.items():
+                    if k not in ('Transfer-Encoding', 'Connection'):
+                        self.send_header(k, v)
+                has_body = resp.code >= 200 and resp.code not in (204, 304)
+                content_length = resp.getheader('Content-Length')
+                # bodies of unknown length (chunked or close-delimited
+                # upstreams) are re-chunked so keep-alive framing holds;
+                # HTTP/1.0 clients get a close-delimited body instead
+                chunked = (has_body and content_length is None
+                           and self.request_version == 'HTTP/1.1')
+                if chunked:
+                    self.send_header('Transfer-Encoding', 'chunked')
+                elif has_body and content_length is None:
+                    self.close_connection = True
+                self.end_headers()
+                # drain the upstream body straight to the client socket
+                # in large chunks, bypassing wfile's buffering
+                self.wfile.flush()
+                sock = self.connection
+                while has_body:
+                    chunk = resp.read(1 << 20)
+                    if not chunk:
+                        break
+                    if chunked:
+                        sock.sendall(b'%x\r\n' % len(chunk))
+                        sock.sendall(chunk)
+                        sock.sendall(b'\r\n')
+                    else:
+                        sock.sendall(chunk)
+                if chunked:
+                    sock.sendall(b'0\r\n\r\n')
+                if not has_body:
+                    # mark the bodyless upstream response fully consumed
+                    # so the cached connection can serve the next request
+                    resp.read()
+            except:
+                # the upstream response was only part-read; the cached
+                # connection can't take another request
+                _drop_upstream_connection(Client, host)
+                raise
 
     def do_GET(self):
-        if self.path.startswith(PORTAL_PATH_PREFIXES):
-            return self._proxy(PORTAL_CLIENT_CLASS, PORTAL_HOST, 'portal')
+        # path with the query string stripped, computed once and reused
+        # by the prefix, redirect and filetype checks below
+        raw_path = self.path.split('?', 1)[0]
 
-        if self.path.startswith('/_search'):
-            return self._proxy(SEARCH_CLIENT_CLASS, SEARCH_HOST, 'search')
+        if raw_path.startswith(PORTAL_PATH_PREFIXES):
+            return self._proxy(PORTAL_CLIENT_CLASS, PORTAL_HOST, 'portal', PORTAL_URL)
 
-        redirect = self.server.redirects.get(self.path)
+        if raw_path.startswith('/_search'):
+            return self._proxy(SEARCH_CLIENT_CLASS, SEARCH_HOST, 'search', SEARCH_URL)
+
+        redirect = None
+        if not raw_path.endswith(ASSET_SUFFIXES):
+            redirect = self.server.redirects.get(raw_path)
         if redirect:
             sa = self.server.socket.getsockname()
             location = 'http://{}:{}{}'.format(*sa, redirect)
-            self.send_response(302)
-            self.send_header('Location', location)
-            self.end_headers()
+            self.send_simple_response(302, headers=(('Location', location),))
         else:
             # default to html if no valid filetype - this is not the right way to do this - it should be a retry.
-            if not self.path.endswith('/') and ('.' not in self.path or self.path.rsplit('.', 1)[1] not in filetypes):
+            if not self.path.endswith('/') and not raw_path.endswith(FILETYPE_SUFFIXES):
                 self.path = self.path + '.html'
             super().do_GET()
 
     def do_POST(self):
+        # always drain the body so it can't be misread as a pipelined
+        # request on the kept-alive connection
+        content_len = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(content_len)
         if self.path == AUTH_PATH_PREFIX:
-            content_len = int(self.headers.get('Content-Length'))
-            body = self.rfile.read(content_len)
-            return self._proxy(PORTAL_CLIENT_CLASS, PORTAL_HOST, 'portal', method='POST', body=body)
+            return self._proxy(PORTAL_CLIENT_CLASS, PORTAL_HOST, 'portal', PORTAL_URL, method='POST', body=body)
+        self.send_simple_response(404)
 
     def translate_path(self, path):
         """Translate a /-separated PATH to the local filename syntax.
@@ -215,6 +519,10 @@ class RequestHandler(SimpleHTTPRequestHandler):
         probably be diagnosed.)
 
         """
+        cached = self._path_cache.get(path)
+        if cached is not None:
+            return cached
+        raw_path = path
         # replace colons (not allowed in win paths) with tilde
         path = path.replace(':', '~')
         # abandon query parameters
@@ -226,36 +534,46 @@ class RequestHandler(SimpleHTTPRequestHandler):
             path = urllib.parse.unquote(path, errors='surrogatepass')
         except UnicodeDecodeError:
             path = urllib.parse.unquote(path)
-        path = posixpath.normpath(path)
-        words = path.split('/')
-        words = filter(None, words)
-        path = DIR
-        for word in words:
-            if os.path.dirname(word) or word in (os.curdir, os.pardir):
-                # Ignore components that are not a simple file/directory name
-                continue
-            path = os.path.join(path, word)
+        if UNSAFE_PATH_RE.search(path):
+            return DIR
+        # drop empty components and anything that is not a simple
+        # file/directory name, then join in one call
+        words = [word for word in path.split('/')
+                 if word and '\\' not in word and word not in (os.curdir, os.pardir)]
+        path = os.path.join(DIR, *words)
         if trailing_slash:
             path += '/'
 
-        if os.path.isdir(path) or path.endswith(".html") or os.path.exists(path):  # html or files in root dir
-            return path
-        else:  # static assets
-            return os.path.join(STATIC_ASSETS_DIR, os.path.relpath(path, DIR))
+        if path.endswith(".html"):  # html always lives in the library tree
+            result = path
+        else:
+            rel = os.path.relpath(path, DIR)
+            if rel in getattr(self.server, 'static_files', ()):  # known static assets
+                result = os.path.join(STATIC_ASSETS_DIR, rel)
+            elif os.path.isdir(path) or os.path.exists(path):  # files in root dir
+                result = path
+            else:  # static assets fallback
+                result = os.path.join(STATIC_ASSETS_DIR, rel)
+
+        if len(self._path_cache) < self._path_cache_max:
+            with self._path_cache_lock:
+                self._path_cache[raw_path] = result
+        return result
 
 
 def get_http_client_info(upstream_name, url):
     """
-    return the http.client class and host needed to reach the given url
+    return the http.client class, host and url needed to reach the
+    given url
     """
     if not url:
-        return None, None
+        return None, None, None
     scheme, host, *_ = urllib.parse.urlparse(url)
     if not scheme:
         print('Must include scheme in {}-proxy-url (e.g. https://example.com, rather than example.com)'.format(upstream_name))
     Client = getattr(http.client, scheme.upper() + 'Connection')
     print('PROXYING: "/_{}" to {}'.format(upstream_name, url))
-    return Client, host
+    return Client, host, url
 
 
 if __name__ == '__main__':
@@ -280,7 +598,7 @@ if __name__ == '__main__':
     args = parser.parse_args()
     server_address = (args.bind, args.port)
 
-    httpd = HTTPServer(server_address, RequestHandler)
+    httpd = Server(server_address, RequestHandler)
 
     raw_redirects = []
     try:
@@ -297,16 +615,32 @@ if __name__ == '__main__':
     print("Visit {} in your webbrowser to view library...".format(url))
     print("\n\n*** This server is designed for local use. Do not use in production. ***\n\n")
 
-    PORTAL_CLIENT_CLASS, PORTAL_HOST = get_http_client_info(
+    PORTAL_CLIENT_CLASS, PORTAL_HOST, PORTAL_URL = get_http_client_info(
         'portal', args.portal_proxy_url)
-    SEARCH_CLIENT_CLASS, SEARCH_HOST = get_http_client_info(
+    SEARCH_CLIENT_CLASS, SEARCH_HOST, SEARCH_URL = get_http_client_info(
         'search', args.search_proxy_url)
 
-    download_static_assets(args.static_assets_repo_url,
-                           force=args.force_update_static_assets)
+    def prepare_static_assets():
+        download_static_assets(args.static_assets_repo_url,
+                               force=args.force_update_static_assets)
+        # index the static-assets tree once so translate_path can route
+        # to it by set membership instead of stat calls
+        static_files = set()
+        for root, dirs, files in os.walk(STATIC_ASSETS_DIR):
+            for name in dirs + files:
+                static_files.add(os.path.relpath(
+                    os.path.join(root, name), STATIC_ASSETS_DIR))
+        httpd.static_files = frozenset(static_files)
+
+    # download and index in the background so the server starts taking
+    # requests immediately; until the index is ready translate_path
+    # falls back to its stat-based probing
+    assets_thread = threading.Thread(target=prepare_static_assets,
+                                     daemon=True)
+    assets_thread.start()
 
     def visit_library():
-        time.sleep(2)
+        httpd.ready.wait()
         webbrowser.open(url, new=2)
 
     if not args.no_open_browser: